@@ -0,0 +1,53 @@
+"""
+Response cache for Patagon Accounting API
+
+In-process TTL cache for read-only QuickBooks responses, grouped by namespace
+so mutations can invalidate everything cached for an entity type.
+"""
+
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """TTL cache of API responses keyed by namespace and request key."""
+
+    def __init__(self, ttl: int, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Dict[Hashable, Tuple[float, Any]]] = {}
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired."""
+        entry = self._entries.get(namespace, {}).get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._entries[namespace].pop(key, None)
+            return None
+        return value
+
+    def set(self, namespace: str, key: Hashable, value: Any):
+        """Store a value for the configured TTL.
+
+        Expired entries in the namespace are dropped first; if it is still
+        full, the oldest entries are evicted to stay within max_entries.
+        """
+        now = time.monotonic()
+        entries = self._entries.setdefault(namespace, {})
+        entries.pop(key, None)
+        if len(entries) >= self.max_entries:
+            for stale in [k for k, (expires_at, _) in entries.items() if expires_at <= now]:
+                del entries[stale]
+            while len(entries) >= self.max_entries:
+                del entries[next(iter(entries))]
+        entries[key] = (now + self.ttl, value)
+
+    def clear(self, *namespaces: str):
+        """Drop cached values for the given namespaces, or everything if none given."""
+        if not namespaces:
+            self._entries.clear()
+            return
+        for namespace in namespaces:
+            self._entries.pop(namespace, None)
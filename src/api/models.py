@@ -0,0 +1,51 @@
+"""
+Request models for Patagon Accounting API
+
+Pydantic models used to validate bulk payloads before any QuickBooks call
+is made. Fields not declared here are kept and passed through unchanged.
+"""
+
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class QuickBooksModel(BaseModel):
+    """Base model for QuickBooks entity payloads."""
+
+    model_config = ConfigDict(extra="allow")
+
+    def to_quickbooks(self) -> dict:
+        """Get the payload as sent by the client, ready for the QuickBooks API."""
+        return self.model_dump(exclude_unset=True)
+
+
+class Ref(QuickBooksModel):
+    """Reference to another QuickBooks entity (e.g., VendorRef)."""
+
+    value: Union[str, int]
+
+
+class VendorIn(QuickBooksModel):
+    """Vendor/contractor to create."""
+
+    DisplayName: str
+    Vendor1099: Optional[bool] = None
+    BillRate: Optional[float] = None
+
+
+class BillIn(QuickBooksModel):
+    """Bill (expense from vendor) to create."""
+
+    VendorRef: Ref
+    Line: List[dict] = Field(min_length=1)
+    TxnDate: Optional[str] = None
+
+
+class BillPaymentIn(QuickBooksModel):
+    """Bill payment to create."""
+
+    VendorRef: Ref
+    PayType: str
+    TotalAmt: float
+    Line: List[dict] = Field(min_length=1)
@@ -0,0 +1,17 @@
+"""
+Response classes for Patagon Accounting API
+
+JSON responses rendered with orjson instead of the stdlib encoder.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -4,18 +4,44 @@ API Routes for Patagon Accounting
 REST API endpoints for QuickBooks data.
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import List
-from fastapi import APIRouter, HTTPException, Body
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, HTTPException, Body, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+
+from src.api.cache import ResponseCache
+from src.api.models import BillIn, BillPaymentIn, VendorIn
+from src.api.responses import ORJSONResponse
+from src.config import settings
+from src.connectors.quickbooks import QuickBooksConnector, QuickBooksError
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+BULK_CONCURRENCY = settings.bulk_concurrency
+
+response_cache = ResponseCache(ttl=settings.cache_ttl, max_entries=settings.cache_max_entries)
+
+# Created lazily so it is bound to the running event loop
+_bulk_sem: Optional[asyncio.Semaphore] = None
+
+# Upstream fetches currently in progress, so concurrent identical GETs share one call
+_inflight: Dict[Hashable, asyncio.Future] = {}
+
+# Preformatted /status body as (expires_at, access_token it describes, body)
+STATUS_CACHE_SECONDS = 1.0
+_status_cache: Optional[Tuple[float, Optional[str], bytes]] = None
+
 
-def get_qb_connector():
-    """Get QuickBooks connector from main app."""
-    from src.main import qb_connector
+async def get_qb_connector(request: Request) -> QuickBooksConnector:
+    """Dependency providing the authenticated QuickBooks connector from app state."""
+    qb_connector = getattr(request.app.state, "qb_connector", None)
     if not qb_connector:
         raise HTTPException(status_code=500, detail="QuickBooks connector not initialized")
     if not qb_connector.is_authenticated:
@@ -23,156 +49,337 @@ def get_qb_connector():
     return qb_connector
 
 
+def _get_bulk_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore limiting concurrent QuickBooks calls from bulk endpoints."""
+    global _bulk_sem
+    if _bulk_sem is None:
+        _bulk_sem = asyncio.Semaphore(BULK_CONCURRENCY)
+    return _bulk_sem
+
+
+async def _gather_bulk(items: List[dict], fn: Callable[[dict], Awaitable[Any]]) -> list:
+    """Run fn for every item concurrently, at most BULK_CONCURRENCY at a time.
+
+    Returns one outcome per item, in order; failures are returned as exceptions.
+    """
+    sem = _get_bulk_semaphore()
+
+    async def _run(item: dict):
+        async with sem:
+            return await fn(item)
+
+    return await asyncio.gather(*(_run(item) for item in items), return_exceptions=True)
+
+
+async def _single_flight(key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Run fetch once for concurrent callers sharing the same key.
+
+    The first caller performs the upstream call; callers arriving while it is
+    in progress await the same result (or exception).
+    """
+    fut = _inflight.get(key)
+    if fut is not None:
+        return await asyncio.shield(fut)
+
+    fut = asyncio.get_running_loop().create_future()
+    _inflight[key] = fut
+    try:
+        data = await fetch()
+    except asyncio.CancelledError:
+        # Waiters were not cancelled themselves: fail them with a normal error
+        fut.set_exception(QuickBooksError("Upstream request was cancelled"))
+        fut.exception()  # Mark retrieved
+        raise
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()  # Mark retrieved; waiters re-raise it themselves
+        raise
+    else:
+        fut.set_result(data)
+        return data
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _render(fetch: Callable[[], Awaitable[Any]]) -> Tuple[bytes, str]:
+    """Fetch a payload and serialize it, returning the JSON body and its ETag."""
+    body = orjson.dumps(await fetch(), option=orjson.OPT_NON_STR_KEYS)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    return body, etag
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _wants_refresh(request: Request) -> bool:
+    """Whether the client asked to bypass caches with `Cache-Control: no-cache`."""
+    return "no-cache" in request.headers.get("cache-control", "")
+
+
+async def _cached(
+    request: Request,
+    qb: QuickBooksConnector,
+    namespace: str,
+    fetch: Callable[[], Awaitable[Any]],
+    params: Tuple = (),
+) -> Response:
+    """Serve a read-only QuickBooks response from cache, fetching it on a miss.
+
+    Entries are keyed on realm and the parameters the handler actually uses
+    (never the raw query string), and hold the serialized body with its ETag;
+    a matching If-None-Match gets a 304. A request sent with
+    `Cache-Control: no-cache` skips the lookup and refreshes the entry.
+    Concurrent misses for the same key share a single upstream call.
+    """
+    key = (qb.realm_id, params)
+    use_cache = response_cache.ttl > 0
+    entry = None
+    if use_cache and not _wants_refresh(request):
+        entry = response_cache.get(namespace, key)
+
+    if entry is None:
+        entry = await _single_flight((namespace, key), lambda: _render(fetch))
+        if use_cache:
+            response_cache.set(namespace, key, entry)
+
+    body, etag = entry
+    # no-cache: browsers revalidate every time (cheap 304s) so the UI sees its own writes
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def _cached_collection(
+    request: Request,
+    qb: QuickBooksConnector,
+    namespace: str,
+    fetch: Callable[[], Awaitable[list]],
+    key: Optional[str] = None,
+    params: Tuple = (),
+) -> Response:
+    """Serve a cached collection endpoint, wrapped in the standard envelope."""
+    async def fetch_envelope():
+        return _envelope(key or namespace, await fetch())
+
+    return await _cached(request, qb, namespace, fetch_envelope, params)
+
+
+def _envelope(key: str, items: list) -> dict:
+    """Wrap a QuickBooks collection in the standard {key: items, "count": n} payload."""
+    return {key: items, "count": len(items)}
+
+
+def _ndjson_response(items: AsyncIterator[dict], entity: str) -> StreamingResponse:
+    """Stream QuickBooks entities as newline-delimited JSON as pages arrive."""
+    async def generate():
+        try:
+            async for item in items:
+                yield orjson.dumps(item) + b"\n"
+        except Exception as e:
+            logger.error("Failed to stream %s: %s", entity, e)
+            raise
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 # ==================== Connection Status ====================
 
 @router.get("/status")
-async def get_status():
-    """Get QuickBooks connection status."""
-    from src.main import qb_connector
+async def get_status(request: Request):
+    """Get QuickBooks connection status.
+
+    The body is rebuilt at most once per STATUS_CACHE_SECONDS, or as soon as
+    the access token changes (refresh, connect or disconnect).
+    """
+    global _status_cache
+    qb_connector = getattr(request.app.state, "qb_connector", None)
 
     if not qb_connector:
         return {"connected": False, "error": "Connector not initialized"}
 
-    return {
+    now = time.monotonic()
+    access_token = qb_connector.access_token
+    if _status_cache and now < _status_cache[0] and _status_cache[1] == access_token:
+        return Response(_status_cache[2], media_type="application/json")
+
+    body = orjson.dumps({
         "connected": qb_connector.is_authenticated,
         "realm_id": qb_connector.realm_id,
         "environment": qb_connector.environment,
         "token_expired": qb_connector.is_token_expired,
-    }
+    })
+    _status_cache = (now + STATUS_CACHE_SECONDS, access_token, body)
+    return Response(body, media_type="application/json")
+
+
+# ==================== Dashboard ====================
+
+@router.get("/dashboard", response_model=None)
+async def get_dashboard(request: Request, qb: QuickBooksConnector = Depends(get_qb_connector)):
+    """Get customers, invoices, payments and accounts with a single QuickBooks batch call."""
+    async def fetch_dashboard():
+        snapshot = await qb.get_dashboard_snapshot()
+        data = {
+            "customers": snapshot["Customer"],
+            "invoices": snapshot["Invoice"],
+            "payments": snapshot["Payment"],
+            "accounts": snapshot["Account"],
+        }
+        data["counts"] = {key: len(items) for key, items in data.items()}
+        return data
+
+    try:
+        return await _cached(request, qb, "dashboard", fetch_dashboard)
+    except Exception as e:
+        logger.error("Failed to get dashboard: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== Company Info ====================
 
-@router.get("/company")
-async def get_company_info():
+@router.get("/company", response_model=None)
+async def get_company_info(request: Request, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get company information."""
-    qb = get_qb_connector()
     try:
-        data = await qb.get_company_info()
-        return data.get("CompanyInfo", {})
+        async def fetch_company():
+            data = await qb.get_company_info(refresh=_wants_refresh(request))
+            return data.get("CompanyInfo", {})
+
+        return await _cached(request, qb, "company", fetch_company)
     except Exception as e:
-        logger.error(f"Failed to get company info: {str(e)}")
+        logger.error("Failed to get company info: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== Customers ====================
 
-@router.get("/customers")
-async def get_customers():
+@router.get("/customers", response_model=None)
+async def get_customers(request: Request, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get all customers."""
-    qb = get_qb_connector()
     try:
-        customers = await qb.get_customers()
-        return {"customers": customers, "count": len(customers)}
+        return await _cached_collection(request, qb, "customers", qb.get_customers)
     except Exception as e:
-        logger.error(f"Failed to get customers: {str(e)}")
+        logger.error("Failed to get customers: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/customers/{customer_id}")
-async def get_customer(customer_id: str):
+@router.get("/customers/stream")
+async def stream_customers(qb: QuickBooksConnector = Depends(get_qb_connector)):
+    """Stream all customers as NDJSON, one QuickBooks page at a time."""
+    return _ndjson_response(qb.iter_customers(), "customers")
+
+
+@router.get("/customers/{customer_id}", response_model=None)
+async def get_customer(customer_id: str, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get a specific customer."""
-    qb = get_qb_connector()
     try:
         customer = await qb.get_customer(customer_id)
-        return customer
+        return ORJSONResponse(customer)
     except Exception as e:
-        logger.error(f"Failed to get customer {customer_id}: {str(e)}")
+        logger.error("Failed to get customer %s: %s", customer_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/customers")
-async def create_customer(customer_data: dict):
+@router.post("/customers", response_model=None)
+async def create_customer(customer_data: dict, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Create a new customer."""
-    qb = get_qb_connector()
     try:
         customer = await qb.create_customer(customer_data)
-        return customer
+        response_cache.clear("customers", "dashboard")
+        return ORJSONResponse(customer)
     except Exception as e:
-        logger.error(f"Failed to create customer: {str(e)}")
+        logger.error("Failed to create customer: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== Invoices ====================
 
-@router.get("/invoices")
-async def get_invoices():
+@router.get("/invoices", response_model=None)
+async def get_invoices(request: Request, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get all invoices."""
-    qb = get_qb_connector()
     try:
-        invoices = await qb.get_invoices()
-        return {"invoices": invoices, "count": len(invoices)}
+        return await _cached_collection(request, qb, "invoices", qb.get_invoices)
     except Exception as e:
-        logger.error(f"Failed to get invoices: {str(e)}")
+        logger.error("Failed to get invoices: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/invoices/{invoice_id}")
-async def get_invoice(invoice_id: str):
+@router.get("/invoices/stream")
+async def stream_invoices(qb: QuickBooksConnector = Depends(get_qb_connector)):
+    """Stream all invoices as NDJSON, one QuickBooks page at a time."""
+    return _ndjson_response(qb.iter_invoices(), "invoices")
+
+
+@router.get("/invoices/{invoice_id}", response_model=None)
+async def get_invoice(invoice_id: str, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get a specific invoice."""
-    qb = get_qb_connector()
     try:
         invoice = await qb.get_invoice(invoice_id)
-        return invoice
+        return ORJSONResponse(invoice)
     except Exception as e:
-        logger.error(f"Failed to get invoice {invoice_id}: {str(e)}")
+        logger.error("Failed to get invoice %s: %s", invoice_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/invoices")
-async def create_invoice(invoice_data: dict):
+@router.post("/invoices", response_model=None)
+async def create_invoice(invoice_data: dict, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Create a new invoice."""
-    qb = get_qb_connector()
     try:
         invoice = await qb.create_invoice(invoice_data)
-        return invoice
+        response_cache.clear("invoices", "dashboard")
+        return ORJSONResponse(invoice)
     except Exception as e:
-        logger.error(f"Failed to create invoice: {str(e)}")
+        logger.error("Failed to create invoice: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== Payments ====================
 
-@router.get("/payments")
-async def get_payments():
+@router.get("/payments", response_model=None)
+async def get_payments(request: Request, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get all payments."""
-    qb = get_qb_connector()
     try:
-        payments = await qb.get_payments()
-        return {"payments": payments, "count": len(payments)}
+        return await _cached_collection(request, qb, "payments", qb.get_payments)
     except Exception as e:
-        logger.error(f"Failed to get payments: {str(e)}")
+        logger.error("Failed to get payments: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/payments")
-async def create_payment(payment_data: dict):
+@router.post("/payments", response_model=None)
+async def create_payment(payment_data: dict, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Create a new payment."""
-    qb = get_qb_connector()
     try:
         payment = await qb.create_payment(payment_data)
-        return payment
+        response_cache.clear("payments", "invoices", "dashboard")
+        return ORJSONResponse(payment)
     except Exception as e:
-        logger.error(f"Failed to create payment: {str(e)}")
+        logger.error("Failed to create payment: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== Chart of Accounts ====================
 
-@router.get("/accounts")
-async def get_accounts():
+@router.get("/accounts", response_model=None)
+async def get_accounts(request: Request, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get chart of accounts."""
-    qb = get_qb_connector()
     try:
-        accounts = await qb.get_accounts()
-        return {"accounts": accounts, "count": len(accounts)}
+        return await _cached_collection(request, qb, "accounts", qb.get_accounts)
     except Exception as e:
-        logger.error(f"Failed to get accounts: {str(e)}")
+        logger.error("Failed to get accounts: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/accounts")
-async def create_account(account_data: dict):
+@router.post("/accounts", response_model=None)
+async def create_account(account_data: dict, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Create a new account in the chart of accounts.
 
     Example payload for Fixed Asset:
@@ -182,43 +389,42 @@ async def create_account(account_data: dict):
         "AccountSubType": "Vehicles"
     }
     """
-    qb = get_qb_connector()
     try:
         account = await qb.create_account(account_data)
-        return account
+        response_cache.clear("accounts", "dashboard")
+        return ORJSONResponse(account)
     except Exception as e:
-        logger.error(f"Failed to create account: {str(e)}")
+        logger.error("Failed to create account: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== Vendors/Contractors ====================
 
-@router.get("/vendors")
-async def get_vendors(max_results: int = 500):
+@router.get("/vendors", response_model=None)
+async def get_vendors(request: Request, max_results: int = 500, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get all vendors/contractors."""
-    qb = get_qb_connector()
     try:
-        vendors = await qb.get_vendors(max_results=max_results)
-        return {"vendors": vendors, "count": len(vendors)}
+        return await _cached_collection(
+            request, qb, "vendors", lambda: qb.get_vendors(max_results=max_results), params=(max_results,)
+        )
     except Exception as e:
-        logger.error(f"Failed to get vendors: {str(e)}")
+        logger.error("Failed to get vendors: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/vendors/{vendor_id}")
-async def get_vendor(vendor_id: str):
+@router.get("/vendors/{vendor_id}", response_model=None)
+async def get_vendor(vendor_id: str, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get a specific vendor/contractor."""
-    qb = get_qb_connector()
     try:
         vendor = await qb.get_vendor(vendor_id)
-        return vendor
+        return ORJSONResponse(vendor)
     except Exception as e:
-        logger.error(f"Failed to get vendor {vendor_id}: {str(e)}")
+        logger.error("Failed to get vendor %s: %s", vendor_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/vendors")
-async def create_vendor(vendor_data: dict):
+@router.post("/vendors", response_model=None)
+async def create_vendor(vendor_data: dict, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Create a new vendor/contractor.
 
     Example payload:
@@ -239,17 +445,17 @@ async def create_vendor(vendor_data: dict):
         }
     }
     """
-    qb = get_qb_connector()
     try:
         vendor = await qb.create_vendor(vendor_data)
-        return vendor
+        response_cache.clear("vendors")
+        return ORJSONResponse(vendor)
     except Exception as e:
-        logger.error(f"Failed to create vendor: {str(e)}")
+        logger.error("Failed to create vendor: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/vendors/bulk")
-async def bulk_create_vendors(vendors: List[dict] = Body(...)):
+@router.post("/vendors/bulk", response_model=None)
+async def bulk_create_vendors(vendors: List[VendorIn] = Body(...), qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Bulk create vendors/contractors.
 
     Example payload:
@@ -258,44 +464,51 @@ async def bulk_create_vendors(vendors: List[dict] = Body(...)):
         {"DisplayName": "Contractor 2", "GivenName": "Jane", "FamilyName": "Smith", "Vendor1099": true, "BillRate": 55.00}
     ]
     """
-    qb = get_qb_connector()
     results = {"created": [], "errors": []}
 
-    for vendor_data in vendors:
-        try:
-            vendor = await qb.create_vendor(vendor_data)
-            results["created"].append(vendor)
-        except Exception as e:
+    # QuickBooks endpoints are per-object, so dispatch the calls concurrently
+    # (bounded by BULK_CONCURRENCY to stay under the per-realm throttle)
+    payloads = [vendor.to_quickbooks() for vendor in vendors]
+    outcomes = await _gather_bulk(payloads, qb.create_vendor)
+    response_cache.clear("vendors")
+    for vendor_data, outcome in zip(payloads, outcomes):
+        if isinstance(outcome, Exception):
             results["errors"].append({
                 "vendor": vendor_data.get("DisplayName", "Unknown"),
-                "error": str(e)
+                "error": str(outcome)
             })
+        else:
+            results["created"].append(outcome)
 
-    return {
+    return ORJSONResponse({
         "total": len(vendors),
         "created_count": len(results["created"]),
         "error_count": len(results["errors"]),
         "created": results["created"],
         "errors": results["errors"]
-    }
+    })
 
 
 # ==================== Bills ====================
 
-@router.get("/bills")
-async def get_bills():
+@router.get("/bills", response_model=None)
+async def get_bills(request: Request, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get all bills."""
-    qb = get_qb_connector()
     try:
-        bills = await qb.get_bills()
-        return {"bills": bills, "count": len(bills)}
+        return await _cached_collection(request, qb, "bills", qb.get_bills)
     except Exception as e:
-        logger.error(f"Failed to get bills: {str(e)}")
+        logger.error("Failed to get bills: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/bills")
-async def create_bill(bill_data: dict):
+@router.get("/bills/stream")
+async def stream_bills(qb: QuickBooksConnector = Depends(get_qb_connector)):
+    """Stream all bills as NDJSON, one QuickBooks page at a time."""
+    return _ndjson_response(qb.iter_bills(), "bills")
+
+
+@router.post("/bills", response_model=None)
+async def create_bill(bill_data: dict, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Create a new bill (expense from vendor).
 
     Example payload:
@@ -314,17 +527,17 @@ async def create_bill(bill_data: dict):
         "TxnDate": "2026-01-17"
     }
     """
-    qb = get_qb_connector()
     try:
         bill = await qb.create_bill(bill_data)
-        return bill
+        response_cache.clear("bills")
+        return ORJSONResponse(bill)
     except Exception as e:
-        logger.error(f"Failed to create bill: {str(e)}")
+        logger.error("Failed to create bill: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/bills/bulk")
-async def bulk_create_bills(bills: List[dict] = Body(...)):
+@router.post("/bills/bulk", response_model=None)
+async def bulk_create_bills(bills: List[BillIn] = Body(...), qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Bulk create bills for contractor payments.
 
     Example payload:
@@ -336,45 +549,44 @@ async def bulk_create_bills(bills: List[dict] = Body(...)):
         }
     ]
     """
-    qb = get_qb_connector()
     results = {"created": [], "errors": []}
 
-    for bill_data in bills:
-        try:
-            bill = await qb.create_bill(bill_data)
-            results["created"].append(bill)
-        except Exception as e:
+    payloads = [bill.to_quickbooks() for bill in bills]
+    outcomes = await _gather_bulk(payloads, qb.create_bill)
+    response_cache.clear("bills")
+    for bill_data, outcome in zip(payloads, outcomes):
+        if isinstance(outcome, Exception):
             vendor_ref = bill_data.get("VendorRef", {}).get("value", "Unknown")
             results["errors"].append({
                 "vendor": vendor_ref,
-                "error": str(e)
+                "error": str(outcome)
             })
+        else:
+            results["created"].append(outcome)
 
-    return {
+    return ORJSONResponse({
         "total": len(bills),
         "created_count": len(results["created"]),
         "error_count": len(results["errors"]),
         "created": results["created"],
         "errors": results["errors"]
-    }
+    })
 
 
 # ==================== Bill Payments ====================
 
-@router.get("/billpayments")
-async def get_bill_payments():
+@router.get("/billpayments", response_model=None)
+async def get_bill_payments(request: Request, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Get all bill payments."""
-    qb = get_qb_connector()
     try:
-        payments = await qb.get_bill_payments()
-        return {"bill_payments": payments, "count": len(payments)}
+        return await _cached_collection(request, qb, "billpayments", qb.get_bill_payments, key="bill_payments")
     except Exception as e:
-        logger.error(f"Failed to get bill payments: {str(e)}")
+        logger.error("Failed to get bill payments: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/billpayments")
-async def create_bill_payment(payment_data: dict):
+@router.post("/billpayments", response_model=None)
+async def create_bill_payment(payment_data: dict, qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Create a bill payment to mark a bill as paid.
 
     Example payload:
@@ -395,17 +607,17 @@ async def create_bill_payment(payment_data: dict):
         ]
     }
     """
-    qb = get_qb_connector()
     try:
         payment = await qb.create_bill_payment(payment_data)
-        return payment
+        response_cache.clear("billpayments", "bills")
+        return ORJSONResponse(payment)
     except Exception as e:
-        logger.error(f"Failed to create bill payment: {str(e)}")
+        logger.error("Failed to create bill payment: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/billpayments/bulk")
-async def bulk_pay_bills(payments: List[dict] = Body(...)):
+@router.post("/billpayments/bulk", response_model=None)
+async def bulk_pay_bills(payments: List[BillPaymentIn] = Body(...), qb: QuickBooksConnector = Depends(get_qb_connector)):
     """Bulk create bill payments to mark multiple bills as paid.
 
     Example payload:
@@ -419,24 +631,25 @@ async def bulk_pay_bills(payments: List[dict] = Body(...)):
         }
     ]
     """
-    qb = get_qb_connector()
     results = {"paid": [], "errors": []}
 
-    for payment_data in payments:
-        try:
-            payment = await qb.create_bill_payment(payment_data)
-            results["paid"].append(payment)
-        except Exception as e:
+    payloads = [payment.to_quickbooks() for payment in payments]
+    outcomes = await _gather_bulk(payloads, qb.create_bill_payment)
+    response_cache.clear("billpayments", "bills")
+    for payment_data, outcome in zip(payloads, outcomes):
+        if isinstance(outcome, Exception):
             vendor_ref = payment_data.get("VendorRef", {}).get("value", "Unknown")
             results["errors"].append({
                 "vendor": vendor_ref,
-                "error": str(e)
+                "error": str(outcome)
             })
+        else:
+            results["paid"].append(outcome)
 
-    return {
+    return ORJSONResponse({
         "total": len(payments),
         "paid_count": len(results["paid"]),
         "error_count": len(results["errors"]),
         "paid": results["paid"],
         "errors": results["errors"]
-    }
+    })
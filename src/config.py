@@ -2,8 +2,8 @@
 Configuration settings for Patagon Accounting QuickBooks Integration
 """
 
+from pydantic import Field
 from pydantic_settings import BaseSettings
-from functools import lru_cache
 
 
 class Settings(BaseSettings):
@@ -31,6 +31,27 @@ class Settings(BaseSettings):
     quickbooks_refresh_token: str = ""
     quickbooks_realm_id: str = ""
 
+    # Maximum number of concurrent QuickBooks calls made by bulk endpoints
+    bulk_concurrency: int = 8
+
+    # Seconds to cache read-only QuickBooks responses (0 disables caching)
+    cache_ttl: int = 60
+
+    # Most responses kept per cached endpoint, oldest evicted first
+    cache_max_entries: int = 256
+
+    # Worker threads available to sync code run through anyio's threadpool
+    thread_limit: int = 100
+
+    # Worker threads in the event loop's default executor (asyncio.to_thread)
+    token_workers: int = 4
+
+    # Client-side QuickBooks rate limiting (Intuit allows 500 requests/minute per realm)
+    qb_max_concurrent_requests: int = Field(10, gt=0)
+    qb_requests_per_minute: int = Field(500, gt=0)
+    # Attempts per API call when QuickBooks throttles (429), or is unavailable (503) for GETs
+    qb_max_attempts: int = 3
+
     @property
     def quickbooks_api_base(self) -> str:
         """Get the appropriate API base URL based on environment."""
@@ -43,7 +64,10 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
 
 
-@lru_cache
+# Settings are loaded once at import time and shared by all modules
+settings = Settings()
+
+
 def get_settings() -> Settings:
-    """Get cached settings instance."""
-    return Settings()
+    """Get the shared settings instance (kept for backward compatibility)."""
+    return settings
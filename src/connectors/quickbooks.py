@@ -4,14 +4,22 @@ QuickBooks Online API Connector
 Handles OAuth 2.0 authentication and API calls to QuickBooks Online.
 """
 
-import json
+import os
 import base64
+import asyncio
 import logging
+import random
+import tempfile
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
 from pathlib import Path
+from urllib.parse import quote, urlencode
 
 import httpx
+import ijson
+import orjson
 
 from src.config import Settings
 
@@ -20,17 +28,113 @@ logger = logging.getLogger(__name__)
 # Token storage file (in production, use database)
 TOKEN_FILE = Path(__file__).parent.parent.parent / "quickbooks_tokens.json"
 
+# Headers shared by all requests to the Intuit token endpoint
+TOKEN_REQUEST_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Accept": "application/json",
+}
+
+
+# Page size used by the list getters, and their query params built once
+LIST_PAGE_SIZE = 100
+LIST_QUERIES = {
+    entity: {"query": f"SELECT * FROM {entity} MAXRESULTS {LIST_PAGE_SIZE}"}
+    for entity in ("Customer", "Invoice", "Payment", "Account", "Vendor", "Bill", "BillPayment")
+}
+
 
 class QuickBooksError(Exception):
     """Base exception for QuickBooks operations."""
     pass
 
 
+def _api_error(response: httpx.Response) -> QuickBooksError:
+    """Log a failed API response and build the error to raise for it."""
+    detail = response.text
+    logger.error("QuickBooks API error: status_code=%s, response=%s", response.status_code, detail)
+    return QuickBooksError(f"API error: {response.status_code} - {detail}")
+
+
+class _AsyncByteReader:
+    """Async file-like wrapper over a byte iterator, as ijson expects."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            # ijson probes with read(0) to detect bytes vs. str
+            return b""
+        # An empty chunk would read as EOF, so skip any the transport yields
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+
 class QuickBooksConnector:
     """Connector for QuickBooks Online API."""
 
+    # Fixed attribute layout: no per-instance __dict__, faster attribute access
+    __slots__ = (
+        "settings",
+        "client_id",
+        "client_secret",
+        "redirect_uri",
+        "environment",
+        "_auth_url_prefix",
+        "_basic_auth",
+        "_client",
+        "_request_slots",
+        "_request_starts",
+        "_rate_lock",
+        "_max_attempts",
+        "access_token",
+        "refresh_token",
+        "_realm_id",
+        "_query_endpoint",
+        "token_expiry",
+        "_token_expiry_monotonic",
+        "_refresh_lock",
+        "_save_lock",
+        "_company_info_cache",
+        "_etag_cache",
+    )
+
     SCOPES = "com.intuit.quickbooks.accounting"
 
+    # Largest page QuickBooks returns for a single query
+    QUERY_PAGE_SIZE = 1000
+
+    # Most operations QuickBooks accepts in one batch request
+    BATCH_MAX_ITEMS = 30
+
+    # Entities included in the dashboard snapshot
+    DASHBOARD_ENTITIES = ("Customer", "Invoice", "Payment", "Account")
+
+    # Seconds to reuse a fetched company info response
+    COMPANY_INFO_TTL = 300
+
+    # Most GET responses kept for ETag revalidation, least recently used evicted first
+    ETAG_CACHE_MAX_ENTRIES = 128
+
+    # Treat access tokens as expired this many seconds early, so a request
+    # is never sent with a token that expires in flight
+    TOKEN_EXPIRY_MARGIN = 60
+
+    # Responses worth retrying after a delay. A throttled (429) request was
+    # not processed, so any method may retry it; a 503 may come from a gateway
+    # after QuickBooks handled the request, so only GETs retry that.
+    RETRY_STATUS_CODES = (429,)
+    GET_RETRY_STATUS_CODES = (429, 503)
+
+    # Exponential backoff bounds, in seconds, when no Retry-After is given
+    RETRY_BASE_DELAY = 1.0
+    RETRY_MAX_DELAY = 30.0
+
+    # Length of the sliding window qb_requests_per_minute is enforced over
+    RATE_WINDOW_SECONDS = 60.0
+
     def __init__(self, settings: Settings):
         self.settings = settings
         self.client_id = settings.quickbooks_client_id
@@ -38,11 +142,57 @@ class QuickBooksConnector:
         self.redirect_uri = settings.quickbooks_redirect_uri
         self.environment = settings.quickbooks_environment
 
+        # Authorization URL up to the per-request state parameter
+        self._auth_url_prefix = f"{settings.quickbooks_auth_url}?" + urlencode({
+            "client_id": self.client_id,
+            "scope": self.SCOPES,
+            "redirect_uri": self.redirect_uri,
+            "response_type": "code",
+        })
+
+        # Basic auth header for the token endpoint, computed once
+        credentials = f"{self.client_id}:{self.client_secret}"
+        self._basic_auth = f"Basic {base64.b64encode(credentials.encode()).decode()}"
+
+        # Long-lived HTTP/2 client so connections are pooled, and concurrent
+        # calls multiplexed, across API calls. Token requests go to a
+        # different host and pass an absolute URL.
+        # The transport also retries failed connection attempts.
+        self._client = httpx.AsyncClient(
+            base_url=self.api_base_url,
+            timeout=30,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30),
+            ),
+        )
+
+        # Client-side rate limiting: bounded concurrency plus a sliding window
+        # holding the start times of the last qb_requests_per_minute requests
+        self._request_slots = asyncio.Semaphore(settings.qb_max_concurrent_requests)
+        self._request_starts: Deque[float] = deque(maxlen=settings.qb_requests_per_minute)
+        self._rate_lock = asyncio.Lock()
+        self._max_attempts = max(1, settings.qb_max_attempts)
+
         # Token storage
         self.access_token: Optional[str] = None
         self.refresh_token: Optional[str] = None
-        self.realm_id: Optional[str] = None
-        self.token_expiry: Optional[datetime] = None
+        self.realm_id = None  # Property; also sets the query endpoint
+        self.token_expiry: Optional[datetime] = None  # Wall-clock, for persistence
+        self._token_expiry_monotonic: float = 0.0  # Used for expiry checks
+
+        # Serializes token refreshes (inline and background)
+        self._refresh_lock = asyncio.Lock()
+        # Serializes writes of the token file
+        self._save_lock = asyncio.Lock()
+
+        # Cached company info as (data, fetched_at monotonic time)
+        self._company_info_cache: Optional[Tuple[dict, float]] = None
+
+        # GET responses that carried an ETag, by (endpoint, params), as
+        # (ETag, parsed body), for conditional requests
+        self._etag_cache: Dict[tuple, Tuple[str, dict]] = {}
 
         # Load stored tokens
         self._load_tokens()
@@ -54,6 +204,17 @@ class QuickBooksConnector:
             return "https://quickbooks.api.intuit.com"
         return "https://sandbox-quickbooks.api.intuit.com"
 
+    @property
+    def realm_id(self) -> Optional[str]:
+        """QuickBooks company ID of the connected realm."""
+        return self._realm_id
+
+    @realm_id.setter
+    def realm_id(self, value: Optional[str]):
+        self._realm_id = value
+        # Query endpoint only depends on the realm, so build it once per connection
+        self._query_endpoint = f"/v3/company/{value}/query" if value else None
+
     @property
     def is_authenticated(self) -> bool:
         """Check if we have valid tokens."""
@@ -61,10 +222,23 @@ class QuickBooksConnector:
 
     @property
     def is_token_expired(self) -> bool:
-        """Check if access token is expired."""
-        if not self.token_expiry:
-            return True
-        return datetime.utcnow() >= self.token_expiry
+        """Check if access token is expired (expiry includes TOKEN_EXPIRY_MARGIN)."""
+        return time.monotonic() >= self._token_expiry_monotonic
+
+    @property
+    def token_expires_in(self) -> float:
+        """Seconds until the access token is considered expired (negative if already)."""
+        return self._token_expiry_monotonic - time.monotonic()
+
+    def _set_token_expiry(self, expires_in: float):
+        """Record when the current access token expires, minus TOKEN_EXPIRY_MARGIN.
+
+        Expiry checks use the monotonic clock so they are immune to wall-clock
+        adjustments; the wall-clock expiry is kept only for persistence.
+        """
+        valid_for = expires_in - self.TOKEN_EXPIRY_MARGIN
+        self._token_expiry_monotonic = time.monotonic() + valid_for
+        self.token_expiry = datetime.utcnow() + timedelta(seconds=valid_for)
 
     def get_authorization_url(self, state: str = "security_token") -> str:
         """
@@ -76,15 +250,7 @@ class QuickBooksConnector:
         Returns:
             Authorization URL to redirect user to
         """
-        params = {
-            "client_id": self.client_id,
-            "scope": self.SCOPES,
-            "redirect_uri": self.redirect_uri,
-            "response_type": "code",
-            "state": state,
-        }
-        query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        return f"{self.settings.quickbooks_auth_url}?{query_string}"
+        return f"{self._auth_url_prefix}&state={quote(state, safe='')}"
 
     async def exchange_code_for_tokens(self, auth_code: str, realm_id: str) -> dict:
         """
@@ -97,15 +263,7 @@ class QuickBooksConnector:
         Returns:
             Token response dict
         """
-        # Create Basic auth header
-        credentials = f"{self.client_id}:{self.client_secret}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-
-        headers = {
-            "Authorization": f"Basic {encoded_credentials}",
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Accept": "application/json",
-        }
+        headers = {**TOKEN_REQUEST_HEADERS, "Authorization": self._basic_auth}
 
         data = {
             "grant_type": "authorization_code",
@@ -113,32 +271,34 @@ class QuickBooksConnector:
             "redirect_uri": self.redirect_uri,
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.settings.quickbooks_token_url,
-                headers=headers,
-                data=data,
-            )
+        response = await self._client.post(
+            self.settings.quickbooks_token_url,
+            headers=headers,
+            data=data,
+        )
 
-            if response.status_code != 200:
-                logger.error(
-                    f"Failed to exchange code for tokens: status_code={response.status_code}, response={response.text}"
-                )
-                raise QuickBooksError(f"Token exchange failed: {response.text}")
+        if response.status_code != 200:
+            detail = response.text
+            logger.error(
+                "Failed to exchange code for tokens: status_code=%s, response=%s", response.status_code, detail
+            )
+            raise QuickBooksError(f"Token exchange failed: {detail}")
 
-            token_data = response.json()
+        token_data = orjson.loads(response.content)
 
         # Store tokens
         self.access_token = token_data.get("access_token")
         self.refresh_token = token_data.get("refresh_token")
         self.realm_id = realm_id
+        self._company_info_cache = None
+        self._etag_cache.clear()
         expires_in = token_data.get("expires_in", 3600)
-        self.token_expiry = datetime.utcnow() + timedelta(seconds=expires_in - 60)
+        self._set_token_expiry(expires_in)
 
         # Persist tokens
-        self._save_tokens()
+        await self._save_tokens()
 
-        logger.info(f"Successfully obtained QuickBooks tokens: realm_id={realm_id}, expires_in={expires_in}")
+        logger.info("Successfully obtained QuickBooks tokens: realm_id=%s, expires_in=%s", realm_id, expires_in)
 
         return token_data
 
@@ -152,52 +312,132 @@ class QuickBooksConnector:
         if not self.refresh_token:
             raise QuickBooksError("No refresh token available")
 
-        credentials = f"{self.client_id}:{self.client_secret}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-
-        headers = {
-            "Authorization": f"Basic {encoded_credentials}",
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Accept": "application/json",
-        }
+        headers = {**TOKEN_REQUEST_HEADERS, "Authorization": self._basic_auth}
 
         data = {
             "grant_type": "refresh_token",
             "refresh_token": self.refresh_token,
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.settings.quickbooks_token_url,
-                headers=headers,
-                data=data,
-            )
+        response = await self._client.post(
+            self.settings.quickbooks_token_url,
+            headers=headers,
+            data=data,
+        )
 
-            if response.status_code != 200:
-                logger.error(
-                    f"Failed to refresh token: status_code={response.status_code}, response={response.text}"
-                )
-                raise QuickBooksError(f"Token refresh failed: {response.text}")
+        if response.status_code != 200:
+            detail = response.text
+            logger.error("Failed to refresh token: status_code=%s, response=%s", response.status_code, detail)
+            raise QuickBooksError(f"Token refresh failed: {detail}")
 
-            token_data = response.json()
+        token_data = orjson.loads(response.content)
 
         # Update tokens
         self.access_token = token_data.get("access_token")
         self.refresh_token = token_data.get("refresh_token", self.refresh_token)
         expires_in = token_data.get("expires_in", 3600)
-        self.token_expiry = datetime.utcnow() + timedelta(seconds=expires_in - 60)
+        self._set_token_expiry(expires_in)
 
         # Persist tokens
-        self._save_tokens()
+        await self._save_tokens()
 
         logger.info("Successfully refreshed QuickBooks access token")
 
         return token_data
 
+    async def refresh_if_expiring(self, margin: float):
+        """Refresh the access token if it expires within margin seconds."""
+        async with self._refresh_lock:
+            if self.refresh_token and self.token_expires_in <= margin:
+                await self.refresh_access_token()
+
     async def _ensure_valid_token(self):
-        """Ensure we have a valid access token, refreshing if needed."""
+        """Ensure we have a valid access token, refreshing if needed.
+
+        Normally the background refresh task renews the token before it
+        expires; this is the fallback for clock skew or a stalled task.
+        """
         if self.is_token_expired and self.refresh_token:
-            await self.refresh_access_token()
+            async with self._refresh_lock:
+                # Re-check: a concurrent request may have refreshed while we waited
+                if self.is_token_expired:
+                    await self.refresh_access_token()
+
+    async def _refresh_rejected_token(self, rejected_token: str):
+        """Refresh after QuickBooks rejected a token, unless another request already did."""
+        async with self._refresh_lock:
+            if self.access_token == rejected_token:
+                await self.refresh_access_token()
+
+    async def _throttle(self):
+        """Wait until a request may start without exceeding the per-minute limit.
+
+        Requests start immediately while fewer than qb_requests_per_minute
+        started in the last RATE_WINDOW_SECONDS; otherwise they wait for the
+        oldest start to leave the window.
+        """
+        async with self._rate_lock:
+            starts = self._request_starts
+            if len(starts) == starts.maxlen:
+                wait = starts[0] + self.RATE_WINDOW_SECONDS - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            # The deque is bounded, so appending drops the oldest start
+            starts.append(time.monotonic())
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Seconds to wait before retrying a throttled or unavailable response.
+
+        Honours a numeric Retry-After header, otherwise backs off exponentially
+        with full jitter.
+        """
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+        ceiling = min(self.RETRY_BASE_DELAY * 2 ** (attempt - 1), self.RETRY_MAX_DELAY)
+        return random.uniform(0, ceiling)
+
+    async def _send(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Send an API request under the rate limiter, retrying throttled responses.
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint
+            **kwargs: Passed through to httpx (headers, content, params)
+
+        Returns:
+            The final response, which may still be an error
+        """
+        client = self._client
+        request_slots = self._request_slots
+        max_attempts = self._max_attempts
+        retry_status_codes = self.GET_RETRY_STATUS_CODES if method == "GET" else self.RETRY_STATUS_CODES
+        attempt = 1
+        while True:
+            async with request_slots:
+                await self._throttle()
+                response = await client.request(method, endpoint, **kwargs)
+            if response.status_code not in retry_status_codes or attempt >= max_attempts:
+                return response
+            delay = self._retry_delay(response, attempt)
+            logger.warning(
+                "QuickBooks returned %s, retrying in %.1fs (attempt %s/%s)",
+                response.status_code, delay, attempt, max_attempts,
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _store_etag(self, key: tuple, entry: Tuple[str, dict]):
+        """Remember a GET response for revalidation, evicting the least recently used."""
+        cache = self._etag_cache
+        cache.pop(key, None)
+        while len(cache) >= self.ETAG_CACHE_MAX_ENTRIES:
+            del cache[next(iter(cache))]
+        cache[key] = entry
 
     async def api_request(
         self,
@@ -209,6 +449,9 @@ class QuickBooksConnector:
         """
         Make an authenticated API request to QuickBooks.
 
+        GET responses carrying an ETag are revalidated with If-None-Match, and
+        any successful non-GET request drops the cached GET responses.
+
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint (e.g., /v3/company/{realmId}/customer)
@@ -220,61 +463,223 @@ class QuickBooksConnector:
         """
         await self._ensure_valid_token()
 
-        if not self.access_token or not self.realm_id:
+        access_token = self.access_token
+        if not access_token or not self.realm_id:
             raise QuickBooksError("Not authenticated. Please connect to QuickBooks first.")
 
-        url = f"{self.api_base_url}{endpoint}"
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        content = orjson.dumps(data) if data is not None else None
+
+        cache_key = None
+        cached = None
+        if method == "GET":
+            cache_key = (endpoint, tuple(sorted(params.items())) if params else ())
+            cached = self._etag_cache.get(cache_key)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+
+        response = await self._send(method, endpoint, headers=headers, content=content, params=params)
+
+        if response.status_code == 401:
+            # Expiry is checked before sending, so this only happens if the
+            # token was revoked or clocks disagree: refresh and retry once
+            await self._refresh_rejected_token(access_token)
+            headers["Authorization"] = f"Bearer {self.access_token}"
+            response = await self._send(method, endpoint, headers=headers, content=content, params=params)
+
+        if response.status_code >= 400:
+            raise _api_error(response)
+
+        if response.status_code == 304 and cached:
+            self._store_etag(cache_key, cached)
+            return cached[1]
+
+        result = orjson.loads(response.content)
+        if cache_key is not None:
+            etag = response.headers.get("ETag")
+            if etag:
+                self._store_etag(cache_key, (etag, result))
+            elif cached:
+                del self._etag_cache[cache_key]
+        elif not endpoint.endswith("/batch"):
+            # Batch requests here only run queries; anything else may have
+            # changed data behind the cached responses
+            self._etag_cache.clear()
+        return result
+
+    async def api_request_stream_items(
+        self,
+        endpoint: str,
+        item_prefix: str,
+        params: Optional[dict] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Make an authenticated GET request and parse the response incrementally.
+
+        Items are yielded as soon as they are parsed from the response stream,
+        so memory stays bounded by one item rather than the whole body.
+
+        Args:
+            endpoint: API endpoint (e.g., /v3/company/{realmId}/query)
+            item_prefix: ijson prefix of the items to yield (e.g., QueryResponse.Invoice.item)
+            params: Query parameters
+
+        Yields:
+            Parsed items matching item_prefix
+        """
+        await self._ensure_valid_token()
+
+        if not self.access_token or not self.realm_id:
+            raise QuickBooksError("Not authenticated. Please connect to QuickBooks first.")
 
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Accept": "application/json",
-            "Content-Type": "application/json",
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=data,
-                params=params,
+        client = self._client
+        attempt = 1
+        while True:
+            # Hold a concurrency slot while the request is sent and its status
+            # read; it is released before yielding, since the consumer controls
+            # how long the body stays open
+            async with self._request_slots:
+                await self._throttle()
+                request = client.build_request("GET", endpoint, headers=headers, params=params)
+                response = await client.send(request, stream=True)
+            try:
+                if response.status_code in self.GET_RETRY_STATUS_CODES and attempt < self._max_attempts:
+                    delay = self._retry_delay(response, attempt)
+                else:
+                    if response.status_code >= 400:
+                        await response.aread()
+                        raise _api_error(response)
+
+                    reader = _AsyncByteReader(response.aiter_bytes())
+                    async for item in ijson.items(reader, item_prefix, use_float=True):
+                        yield item
+                    return
+            finally:
+                await response.aclose()
+            logger.warning(
+                "QuickBooks returned %s, retrying in %.1fs (attempt %s/%s)",
+                response.status_code, delay, attempt, self._max_attempts,
             )
+            await asyncio.sleep(delay)
+            attempt += 1
 
-            if response.status_code == 401:
-                # Token might be expired, try refresh
-                await self.refresh_access_token()
-                headers["Authorization"] = f"Bearer {self.access_token}"
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    json=data,
-                    params=params,
-                )
-
-            if response.status_code >= 400:
-                logger.error(
-                    f"QuickBooks API error: status_code={response.status_code}, response={response.text}"
-                )
-                raise QuickBooksError(f"API error: {response.status_code} - {response.text}")
-
-            return response.json()
+    async def iter_query(self, entity: str, page_size: int = QUERY_PAGE_SIZE) -> AsyncIterator[dict]:
+        """
+        Iterate over every entity of a type, streaming one query page at a time.
+
+        Args:
+            entity: QuickBooks entity name (e.g., Invoice, Customer)
+            page_size: Number of entities requested per page
+
+        Yields:
+            Entity dicts, in QuickBooks order
+        """
+        endpoint = self._query_endpoint
+        start_position = 1
+        while True:
+            params = {"query": f"SELECT * FROM {entity} STARTPOSITION {start_position} MAXRESULTS {page_size}"}
+            count = 0
+            async for item in self.api_request_stream_items(endpoint, f"QueryResponse.{entity}.item", params=params):
+                count += 1
+                yield item
+            if count < page_size:
+                return
+            start_position += page_size
+
+    async def batch_query(self, queries: list) -> list:
+        """
+        Run several queries in a single batch request.
+
+        Args:
+            queries: QuickBooks query strings (at most BATCH_MAX_ITEMS)
+
+        Returns:
+            QueryResponse dict for each query, in the same order
+        """
+        if len(queries) > self.BATCH_MAX_ITEMS:
+            raise QuickBooksError(f"Batch requests are limited to {self.BATCH_MAX_ITEMS} queries")
+
+        endpoint = f"/v3/company/{self.realm_id}/batch"
+        payload = {
+            "BatchItemRequest": [{"bId": f"q{i}", "Query": query} for i, query in enumerate(queries)]
+        }
+        response = await self.api_request("POST", endpoint, data=payload)
+
+        items = {item.get("bId"): item for item in response.get("BatchItemResponse", [])}
+        results = []
+        for i in range(len(queries)):
+            item = items.get(f"q{i}", {})
+            if "Fault" in item:
+                raise QuickBooksError(f"Batch query failed: {item['Fault']}")
+            results.append(item.get("QueryResponse", {}))
+        return results
+
+    async def get_dashboard_snapshot(self, max_results: int = 100) -> dict:
+        """Get customers, invoices, payments and accounts in one batch request."""
+        queries = [f"SELECT * FROM {entity} MAXRESULTS {max_results}" for entity in self.DASHBOARD_ENTITIES]
+        responses = await self.batch_query(queries)
+        return {
+            entity: response.get(entity, [])
+            for entity, response in zip(self.DASHBOARD_ENTITIES, responses)
+        }
+
+    async def _list_entity(self, entity: str, max_results: int) -> list:
+        """
+        Get up to max_results entities of a type with a single query.
+
+        Args:
+            entity: QuickBooks entity name (e.g., Invoice, Customer)
+            max_results: Maximum number of entities to return
+
+        Returns:
+            Entity dicts, in QuickBooks order
+        """
+        params = LIST_QUERIES.get(entity) if max_results == LIST_PAGE_SIZE else None
+        if params is None:
+            params = {"query": f"SELECT * FROM {entity} MAXRESULTS {max_results}"}
+        response = await self.api_request("GET", self._query_endpoint, params=params)
+        return response.get("QueryResponse", {}).get(entity, [])
 
     # ==================== Company Info ====================
 
-    async def get_company_info(self) -> dict:
-        """Get company information."""
+    async def get_company_info(self, refresh: bool = False) -> dict:
+        """
+        Get company information (cached for COMPANY_INFO_TTL seconds).
+
+        Args:
+            refresh: Skip the cache and fetch from QuickBooks
+
+        Returns:
+            CompanyInfo response as dict
+        """
+        if self._company_info_cache and not refresh:
+            data, fetched_at = self._company_info_cache
+            if time.monotonic() - fetched_at < self.COMPANY_INFO_TTL:
+                return data
+
         endpoint = f"/v3/company/{self.realm_id}/companyinfo/{self.realm_id}"
-        return await self.api_request("GET", endpoint)
+        data = await self.api_request("GET", endpoint)
+        self._company_info_cache = (data, time.monotonic())
+        return data
 
     # ==================== Customers ====================
 
-    async def get_customers(self, max_results: int = 100) -> list:
+    async def get_customers(self, max_results: int = LIST_PAGE_SIZE) -> list:
         """Get all customers."""
-        endpoint = f"/v3/company/{self.realm_id}/query"
-        params = {"query": f"SELECT * FROM Customer MAXRESULTS {max_results}"}
-        response = await self.api_request("GET", endpoint, params=params)
-        return response.get("QueryResponse", {}).get("Customer", [])
+        return await self._list_entity("Customer", max_results)
+
+    def iter_customers(self) -> AsyncIterator[dict]:
+        """Iterate over all customers, page by page."""
+        return self.iter_query("Customer")
 
     async def get_customer(self, customer_id: str) -> dict:
         """Get a specific customer."""
@@ -290,12 +695,13 @@ class QuickBooksConnector:
 
     # ==================== Invoices ====================
 
-    async def get_invoices(self, max_results: int = 100) -> list:
+    async def get_invoices(self, max_results: int = LIST_PAGE_SIZE) -> list:
         """Get all invoices."""
-        endpoint = f"/v3/company/{self.realm_id}/query"
-        params = {"query": f"SELECT * FROM Invoice MAXRESULTS {max_results}"}
-        response = await self.api_request("GET", endpoint, params=params)
-        return response.get("QueryResponse", {}).get("Invoice", [])
+        return await self._list_entity("Invoice", max_results)
+
+    def iter_invoices(self) -> AsyncIterator[dict]:
+        """Iterate over all invoices, page by page."""
+        return self.iter_query("Invoice")
 
     async def get_invoice(self, invoice_id: str) -> dict:
         """Get a specific invoice."""
@@ -311,12 +717,9 @@ class QuickBooksConnector:
 
     # ==================== Payments ====================
 
-    async def get_payments(self, max_results: int = 100) -> list:
+    async def get_payments(self, max_results: int = LIST_PAGE_SIZE) -> list:
         """Get all payments."""
-        endpoint = f"/v3/company/{self.realm_id}/query"
-        params = {"query": f"SELECT * FROM Payment MAXRESULTS {max_results}"}
-        response = await self.api_request("GET", endpoint, params=params)
-        return response.get("QueryResponse", {}).get("Payment", [])
+        return await self._list_entity("Payment", max_results)
 
     async def create_payment(self, payment_data: dict) -> dict:
         """Create a new payment."""
@@ -326,12 +729,9 @@ class QuickBooksConnector:
 
     # ==================== Chart of Accounts ====================
 
-    async def get_accounts(self, max_results: int = 100) -> list:
+    async def get_accounts(self, max_results: int = LIST_PAGE_SIZE) -> list:
         """Get chart of accounts."""
-        endpoint = f"/v3/company/{self.realm_id}/query"
-        params = {"query": f"SELECT * FROM Account MAXRESULTS {max_results}"}
-        response = await self.api_request("GET", endpoint, params=params)
-        return response.get("QueryResponse", {}).get("Account", [])
+        return await self._list_entity("Account", max_results)
 
     async def create_account(self, account_data: dict) -> dict:
         """Create a new account in the chart of accounts."""
@@ -341,12 +741,9 @@ class QuickBooksConnector:
 
     # ==================== Vendors ====================
 
-    async def get_vendors(self, max_results: int = 100) -> list:
+    async def get_vendors(self, max_results: int = LIST_PAGE_SIZE) -> list:
         """Get all vendors."""
-        endpoint = f"/v3/company/{self.realm_id}/query"
-        params = {"query": f"SELECT * FROM Vendor MAXRESULTS {max_results}"}
-        response = await self.api_request("GET", endpoint, params=params)
-        return response.get("QueryResponse", {}).get("Vendor", [])
+        return await self._list_entity("Vendor", max_results)
 
     async def create_vendor(self, vendor_data: dict) -> dict:
         """Create a new vendor/contractor."""
@@ -368,12 +765,13 @@ class QuickBooksConnector:
 
     # ==================== Bills ====================
 
-    async def get_bills(self, max_results: int = 100) -> list:
+    async def get_bills(self, max_results: int = LIST_PAGE_SIZE) -> list:
         """Get all bills."""
-        endpoint = f"/v3/company/{self.realm_id}/query"
-        params = {"query": f"SELECT * FROM Bill MAXRESULTS {max_results}"}
-        response = await self.api_request("GET", endpoint, params=params)
-        return response.get("QueryResponse", {}).get("Bill", [])
+        return await self._list_entity("Bill", max_results)
+
+    def iter_bills(self) -> AsyncIterator[dict]:
+        """Iterate over all bills, page by page."""
+        return self.iter_query("Bill")
 
     async def create_bill(self, bill_data: dict) -> dict:
         """Create a new bill (expense from vendor)."""
@@ -387,45 +785,65 @@ class QuickBooksConnector:
         response = await self.api_request("POST", endpoint, data=payment_data)
         return response.get("BillPayment", {})
 
-    async def get_bill_payments(self, max_results: int = 100) -> list:
+    async def get_bill_payments(self, max_results: int = LIST_PAGE_SIZE) -> list:
         """Get all bill payments."""
-        endpoint = f"/v3/company/{self.realm_id}/query"
-        params = {"query": f"SELECT * FROM BillPayment MAXRESULTS {max_results}"}
-        response = await self.api_request("GET", endpoint, params=params)
-        return response.get("QueryResponse", {}).get("BillPayment", [])
+        return await self._list_entity("BillPayment", max_results)
 
     # ==================== Token Storage ====================
 
-    def _save_tokens(self):
-        """Save tokens to file (in production, use database)."""
-        token_data = {
-            "access_token": self.access_token,
-            "refresh_token": self.refresh_token,
-            "realm_id": self.realm_id,
-            "token_expiry": self.token_expiry.isoformat() if self.token_expiry else None,
-        }
+    async def _save_tokens(self):
+        """Save tokens to file (in production, use database) without blocking the event loop.
+
+        Saves are serialized and snapshot the tokens once they hold the lock,
+        so an older snapshot can never replace a newer one.
+        """
+        async with self._save_lock:
+            token_data = {
+                "access_token": self.access_token,
+                "refresh_token": self.refresh_token,
+                "realm_id": self.realm_id,
+                "token_expiry": self.token_expiry.isoformat() if self.token_expiry else None,
+            }
+            await asyncio.to_thread(self._write_token_file, token_data)
+
+    @staticmethod
+    def _write_token_file(token_data: dict):
+        """Atomically replace the token file, so a crash never leaves it half-written."""
+        tmp_path = None
         try:
-            with open(TOKEN_FILE, "w") as f:
-                json.dump(token_data, f)
+            fd, tmp_path = tempfile.mkstemp(dir=TOKEN_FILE.parent, prefix=TOKEN_FILE.name, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(token_data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, TOKEN_FILE)
             logger.info("Tokens saved successfully")
         except Exception as e:
-            logger.error(f"Failed to save tokens: {str(e)}")
+            logger.error("Failed to save tokens: %s", e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
 
     def _load_tokens(self):
         """Load tokens from file."""
         try:
             if TOKEN_FILE.exists():
-                with open(TOKEN_FILE, "r") as f:
-                    token_data = json.load(f)
+                with open(TOKEN_FILE, "rb") as f:
+                    token_data = orjson.loads(f.read())
                 self.access_token = token_data.get("access_token")
                 self.refresh_token = token_data.get("refresh_token")
                 self.realm_id = token_data.get("realm_id")
                 expiry_str = token_data.get("token_expiry")
                 if expiry_str:
                     self.token_expiry = datetime.fromisoformat(expiry_str)
-                logger.info(f"Tokens loaded successfully: realm_id={self.realm_id}")
+                    remaining = (self.token_expiry - datetime.utcnow()).total_seconds()
+                    self._token_expiry_monotonic = time.monotonic() + remaining
+                logger.info("Tokens loaded successfully: realm_id=%s", self.realm_id)
         except Exception as e:
-            logger.warning(f"Failed to load tokens: {str(e)}")
+            logger.warning("Failed to load tokens: %s", e)
+
+    async def aclose(self):
+        """Close the underlying HTTP client and its pooled connections."""
+        await self._client.aclose()
 
     def disconnect(self):
         """Clear stored tokens."""
@@ -433,6 +851,9 @@ class QuickBooksConnector:
         self.refresh_token = None
         self.realm_id = None
         self.token_expiry = None
+        self._token_expiry_monotonic = 0.0
+        self._company_info_cache = None
+        self._etag_cache.clear()
         if TOKEN_FILE.exists():
             TOKEN_FILE.unlink()
         logger.info("Disconnected from QuickBooks")
@@ -4,17 +4,27 @@ Patagon Accounting - QuickBooks Integration
 FastAPI application for QuickBooks Online accounting integration.
 """
 
+import asyncio
+import base64
+import hashlib
+import hmac
 import secrets
 import logging
-from contextlib import asynccontextmanager
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
+from typing import Optional, Set
 
-from fastapi import FastAPI, Request, HTTPException
+import anyio
+from fastapi import Depends, FastAPI, Request, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 
-from src.config import get_settings
+from src.config import settings
 from src.connectors.quickbooks import QuickBooksConnector
+from src.api.responses import ORJSONResponse
 from src.api.routes import router as api_router
 
 # Configure logging
@@ -24,20 +34,66 @@ logger = logging.getLogger(__name__)
 # Global connector instance
 qb_connector: QuickBooksConnector = None
 
+# Refresh the access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 300
+# Longest sleep between checks, so newly connected sessions are picked up
+TOKEN_REFRESH_POLL_SECONDS = 60
+
+# Fire-and-forget tasks, referenced here until they finish
+_background_tasks: Set[asyncio.Task] = set()
+
+# Signed cookie caching the company name shown on the home page
+COMPANY_COOKIE = "qb_company"
+COMPANY_COOKIE_MAX_AGE = 3600
+
+
+async def _refresh_loop(connector: QuickBooksConnector):
+    """Background task keeping the QuickBooks access token fresh."""
+    while True:
+        delay = TOKEN_REFRESH_POLL_SECONDS
+        if connector.refresh_token:
+            until_refresh = connector.token_expires_in - TOKEN_REFRESH_MARGIN
+            if until_refresh <= 0:
+                try:
+                    await connector.refresh_if_expiring(TOKEN_REFRESH_MARGIN)
+                    continue
+                except Exception as e:
+                    logger.error(f"Background token refresh failed: {e}")
+            else:
+                delay = min(delay, until_refresh)
+        await asyncio.sleep(delay)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     global qb_connector
+    refresh_task = None
     try:
-        settings = get_settings()
         logger.info(f"Settings loaded, environment: {settings.quickbooks_environment}")
+        # Handlers are all async; size the threadpool for the sync work that remains
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.thread_limit
+        # Small bounded executor for blocking work offloaded with asyncio.to_thread
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=settings.token_workers, thread_name_prefix="patagon-worker")
+        )
         qb_connector = QuickBooksConnector(settings)
+        app.state.qb_connector = qb_connector
+        # Compile templates before the first request needs them
+        for name in TEMPLATE_NAMES:
+            templates.env.get_template(name)
+        refresh_task = asyncio.create_task(_refresh_loop(qb_connector))
         logger.info("Patagon Accounting started")
     except Exception as e:
         logger.error(f"Failed to initialize: {e}")
     yield
     logger.info("Patagon Accounting shutting down")
+    if refresh_task:
+        refresh_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresh_task
+    if qb_connector:
+        await qb_connector.aclose()
 
 
 app = FastAPI(
@@ -45,11 +101,22 @@ app = FastAPI(
     description="QuickBooks Online Integration for Patagon Consulting",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Templates
 TEMPLATES_DIR = Path(__file__).parent / "templates"
+TEMPLATE_NAMES = (
+    "index.html", "customers.html", "invoices.html", "payments.html", "accounts.html",
+    "error.html", "privacy.html", "eula.html", "contractors.html",
+)
+
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+# Share compiled templates across workers and restarts. The default location
+# is a per-user 0700 temp directory, since cached bytecode is loaded as code.
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+# Only check template files for changes while developing
+templates.env.auto_reload = settings.debug
 
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
@@ -92,6 +159,56 @@ def get_quickbooks() -> QuickBooksConnector:
     return qb_connector
 
 
+async def require_qb() -> QuickBooksConnector:
+    """Get the connector, redirecting to the home page when not connected."""
+    if not qb_connector or not qb_connector.is_authenticated:
+        raise HTTPException(status_code=307, headers={"Location": "/"})
+    return qb_connector
+
+
+def _sign(payload: str) -> str:
+    """HMAC signature of a cookie payload using the app secret key."""
+    return hmac.new(settings.secret_key.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def _company_cookie(realm_id: str, company_name: str) -> str:
+    """Build a signed cookie value caching the company name for a realm."""
+    name = base64.urlsafe_b64encode(company_name.encode()).decode()
+    payload = f"{realm_id}.{int(time.time())}.{name}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def _read_company_cookie(value: Optional[str], realm_id: str) -> Optional[str]:
+    """Company name from a valid, fresh cookie for this realm, else None."""
+    if not value:
+        return None
+    try:
+        payload, signature = value.rsplit(".", 1)
+        cookie_realm, issued_at, name = payload.split(".", 2)
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        if cookie_realm != realm_id or time.time() - int(issued_at) > COMPANY_COOKIE_MAX_AGE:
+            return None
+        return base64.urlsafe_b64decode(name.encode()).decode()
+    except ValueError:
+        return None
+
+
+def _refresh_in_background(connector: QuickBooksConnector):
+    """Renew an expired token without making the current request wait for it."""
+    task = asyncio.create_task(connector._ensure_valid_token())
+    # Keep a strong reference until done, or the task may be garbage collected
+    _background_tasks.add(task)
+    task.add_done_callback(_finish_background_refresh)
+
+
+def _finish_background_refresh(task: asyncio.Task):
+    """Drop a finished refresh task and log its error, since nobody awaits it."""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error(f"Token refresh failed: {task.exception()}")
+
+
 # ==================== OAuth Routes ====================
 
 @app.get("/", response_class=HTMLResponse)
@@ -99,16 +216,24 @@ async def home(request: Request):
     """Home page with QuickBooks connection status."""
     is_connected = qb_connector.is_authenticated if qb_connector else False
     company_name = None
+    company_cookie = None
 
     if is_connected:
-        try:
-            company_info = await qb_connector.get_company_info()
-            company_name = company_info.get("CompanyInfo", {}).get("CompanyName", "Unknown")
-        except Exception as e:
-            logger.error(f"Failed to get company info: {e}")
-            is_connected = False
-
-    return templates.TemplateResponse(
+        company_name = _read_company_cookie(request.cookies.get(COMPANY_COOKIE), qb_connector.realm_id)
+        if company_name is None:
+            try:
+                company_info = await qb_connector.get_company_info()
+                company_name = company_info.get("CompanyInfo", {}).get("CompanyName", "Unknown")
+                company_cookie = _company_cookie(qb_connector.realm_id, company_name)
+            except Exception as e:
+                logger.error(f"Failed to get company info: {e}")
+                is_connected = False
+        elif qb_connector.is_token_expired:
+            # The page itself needs no API call; renew the token while it renders
+            # so the dashboard's follow-up API requests don't wait for it
+            _refresh_in_background(qb_connector)
+
+    response = templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -117,6 +242,12 @@ async def home(request: Request):
             "realm_id": qb_connector.realm_id if qb_connector else None,
         }
     )
+    if company_cookie:
+        response.set_cookie(
+            COMPANY_COOKIE, company_cookie,
+            max_age=COMPANY_COOKIE_MAX_AGE, httponly=True, samesite="lax",
+        )
+    return response
 
 
 @app.get("/connect")
@@ -172,45 +303,34 @@ async def disconnect_quickbooks():
     """Disconnect from QuickBooks."""
     if qb_connector:
         qb_connector.disconnect()
-    return RedirectResponse(url="/")
+    response = RedirectResponse(url="/")
+    response.delete_cookie(COMPANY_COOKIE)
+    return response
 
 
 # ==================== Dashboard Routes ====================
 
-@app.get("/customers", response_class=HTMLResponse)
-async def customers_page(request: Request):
-    """Customers page."""
-    if not qb_connector or not qb_connector.is_authenticated:
-        return RedirectResponse(url="/")
+# Authenticated pages, each rendered from its own <page>.html template
+DASHBOARD_PAGES = ("customers", "invoices", "payments", "accounts")
 
-    return templates.TemplateResponse("customers.html", {"request": request})
 
+def _dashboard_page(page: str):
+    """Build the handler rendering one dashboard page's template."""
+    template_name = f"{page}.html"
 
-@app.get("/invoices", response_class=HTMLResponse)
-async def invoices_page(request: Request):
-    """Invoices page."""
-    if not qb_connector or not qb_connector.is_authenticated:
-        return RedirectResponse(url="/")
+    async def dashboard_page(request: Request):
+        """Customers, invoices, payments or chart of accounts page."""
+        return templates.TemplateResponse(template_name, {"request": request})
 
-    return templates.TemplateResponse("invoices.html", {"request": request})
+    return dashboard_page
 
 
-@app.get("/payments", response_class=HTMLResponse)
-async def payments_page(request: Request):
-    """Payments page."""
-    if not qb_connector or not qb_connector.is_authenticated:
-        return RedirectResponse(url="/")
-
-    return templates.TemplateResponse("payments.html", {"request": request})
-
-
-@app.get("/accounts", response_class=HTMLResponse)
-async def accounts_page(request: Request):
-    """Chart of Accounts page."""
-    if not qb_connector or not qb_connector.is_authenticated:
-        return RedirectResponse(url="/")
-
-    return templates.TemplateResponse("accounts.html", {"request": request})
+for page in DASHBOARD_PAGES:
+    app.add_api_route(
+        f"/{page}", _dashboard_page(page),
+        methods=["GET"], name=f"{page}_page",
+        response_class=HTMLResponse, dependencies=[Depends(require_qb)],
+    )
 
 
 if __name__ == "__main__":